@@ -3,36 +3,36 @@ Bin Actuator Emulator
 Simulates the physical mechanism for emptying the bin
 """
 
-import time
 import logging
-import threading
+import tkinter as tk
 from typing import Optional, Callable
-from enum import Enum
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("actuators.log"), logging.StreamHandler()],
-)
+from enum import IntEnum
+
 logger = logging.getLogger("BinActuator")
 
 
-class ActuatorState(Enum):
+class ActuatorState(IntEnum):
     """Possible states of the bin actuator"""
 
-    IDLE = "IDLE"
-    OPENING = "OPENING"
-    EMPTYING = "EMPTYING"
-    CLOSING = "CLOSING"
-    ERROR = "ERROR"
+    IDLE = 0
+    OPENING = 1
+    EMPTYING = 2
+    CLOSING = 3
+    ERROR = 4
+
+
+# State names indexed by state ordinal
+ACTUATOR_STATE_NAMES = tuple(s.name for s in ActuatorState)
 
 
 class BinActuator:
     """Emulates a physical actuator mechanism for emptying bins"""
 
     def __init__(
-        self, actuator_id: str, state_callback: Callable[[ActuatorState], None]
+        self,
+        actuator_id: str,
+        state_callback: Callable[[ActuatorState], None],
+        master: tk.Misc,
     ):
         """
         Initialize the bin actuator emulator
@@ -40,12 +40,14 @@ class BinActuator:
         Args:
             actuator_id: Unique identifier for this actuator
             state_callback: Callback function to handle state changes
+            master: Tk widget whose event loop schedules the emptying phases
         """
         self.actuator_id = actuator_id
         self.state_callback = state_callback
+        self.master = master
         self.current_state = ActuatorState.IDLE
         self.is_powered = False
-        self._thread: Optional[threading.Thread] = None
+        self._after_id: Optional[str] = None
         logger.info(f"Bin actuator {actuator_id} initialized")
 
     def power_on(self) -> None:
@@ -57,9 +59,10 @@ class BinActuator:
     def power_off(self) -> None:
         """Power off the actuator"""
         self.is_powered = False
+        if self._after_id:
+            self.master.after_cancel(self._after_id)
+            self._after_id = None
         self._update_state(ActuatorState.IDLE)
-        if self._thread and self._thread.is_alive():
-            self._thread.join(timeout=1.0)
         logger.info(f"Actuator {self.actuator_id} powered off")
 
     def trigger_empty(self) -> None:
@@ -69,31 +72,45 @@ class BinActuator:
             return
 
         if self.current_state != ActuatorState.IDLE:
-            logger.warning(f"Cannot empty bin: actuator is busy ({self.current_state})")
+            logger.warning(
+                f"Cannot empty bin: actuator is busy ({self.current_state.name})"
+            )
             return
 
-        self._thread = threading.Thread(target=self._emptying_sequence, daemon=True)
-        self._thread.start()
         logger.info(f"Started emptying sequence for bin {self.actuator_id}")
+        # Opening the bin
+        self._run_phase(ActuatorState.OPENING, 2000, self._phase_emptying)
+
+    def _phase_emptying(self) -> None:
+        """Emptying contents"""
+        self._run_phase(ActuatorState.EMPTYING, 3000, self._phase_closing)
+
+    def _phase_closing(self) -> None:
+        """Closing the bin"""
+        self._run_phase(ActuatorState.CLOSING, 2000, self._phase_idle)
+
+    def _phase_idle(self) -> None:
+        """Back to idle"""
+        self._run_phase(ActuatorState.IDLE)
+        logger.info(f"Emptying sequence completed for bin {self.actuator_id}")
+
+    def _run_phase(
+        self,
+        state: ActuatorState,
+        duration_ms: int = 0,
+        next_phase: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Enter a state of the emptying sequence and schedule the next one"""
+        self._after_id = None
+        if not self.is_powered:
+            return  # Powered off since this phase was scheduled
 
-    def _emptying_sequence(self) -> None:
-        """Simulate the bin emptying sequence"""
         try:
-            # Opening the bin
-            self._update_state(ActuatorState.OPENING)
-            time.sleep(2)  # Simulate time to open
-
-            # Emptying contents
-            self._update_state(ActuatorState.EMPTYING)
-            time.sleep(3)  # Simulate time to empty
-
-            # Closing the bin
-            self._update_state(ActuatorState.CLOSING)
-            time.sleep(2)  # Simulate time to close
-
-            # Back to idle
-            self._update_state(ActuatorState.IDLE)
-            logger.info(f"Emptying sequence completed for bin {self.actuator_id}")
+            self._update_state(state)
+            if next_phase:
+                # Simulate time spent in this state on the Tk event loop, so
+                # any number of actuators share one scheduler and no threads
+                self._after_id = self.master.after(duration_ms, next_phase)
 
         except Exception as e:
             logger.error(f"Error during emptying sequence: {e}")
@@ -103,7 +120,12 @@ class BinActuator:
         """Update actuator state and notify through callback"""
         self.current_state = new_state
         self.state_callback(new_state)
-        logger.debug(f"Actuator {self.actuator_id} state changed to {new_state.value}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Actuator %s state changed to %s",
+                self.actuator_id,
+                ACTUATOR_STATE_NAMES[new_state],
+            )
 
     def get_state(self) -> ActuatorState:
         """Get current actuator state"""
@@ -8,18 +8,18 @@ from tkinter import ttk
 import logging
 from typing import Callable, Dict, Optional
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("controls.log"), logging.StreamHandler()],
-)
 logger = logging.getLogger("ControlPanel")
 
+# Minimum interval between fill rate callbacks while the knob is dragged
+RATE_THROTTLE_MS = 50
+
 
 class ControlPanel:
     """Emulates a physical control panel with buttons and knobs"""
 
+    # Set once the shared ttk styles have been configured
+    _styles_ready = False
+
     def __init__(self, container: ttk.Frame, panel_id: str):
         """
         Initialize the control panel emulator
@@ -31,6 +31,11 @@ class ControlPanel:
         self.container = container
         self.panel_id = panel_id
         self.callbacks: Dict[str, Callable] = {}
+        self._power_on = False
+
+        # Rate changes are forwarded at most once per RATE_THROTTLE_MS
+        self._pending_rate: Optional[float] = None
+        self._rate_after_id: Optional[str] = None
 
         self._create_widgets()
         logger.info(f"Control panel {panel_id} initialized")
@@ -78,10 +83,14 @@ class ControlPanel:
         self.status_label.grid(row=4, column=0, columnspan=2)
 
         # Configure emergency button style
-        style = ttk.Style()
-        style.configure(
-            "Emergency.TButton", foreground="red", font=("TkDefaultFont", 10, "bold")
-        )
+        if not self.__class__._styles_ready:
+            style = ttk.Style()
+            style.configure(
+                "Emergency.TButton",
+                foreground="red",
+                font=("TkDefaultFont", 10, "bold"),
+            )
+            self.__class__._styles_ready = True
 
     def register_callback(self, event: str, callback: Callable) -> None:
         """Register a callback for control panel events"""
@@ -97,24 +106,30 @@ class ControlPanel:
     def _on_rate_change(self, value: str) -> None:
         """Handle fill rate knob adjustment"""
         try:
-            rate = float(value)
-            if "rate_change" in self.callbacks:
-                self.callbacks["rate_change"](rate)
-                logger.debug(f"Fill rate adjusted to {rate}")
+            self._pending_rate = float(value)
+            if self._rate_after_id is None:
+                self._rate_after_id = self.container.after(
+                    RATE_THROTTLE_MS, self._flush_rate
+                )
         except ValueError:
             logger.error(f"Invalid rate value: {value}")
 
+    def _flush_rate(self) -> None:
+        """Forward the latest fill rate to the registered callback"""
+        self._rate_after_id = None
+        rate = self._pending_rate
+        if "rate_change" in self.callbacks:
+            self.callbacks["rate_change"](rate)
+            logger.debug("Fill rate adjusted to %s", rate)
+
     def _on_power_toggle(self) -> None:
         """Handle power button press"""
-        current_state = self.power_btn.cget("text")
-        new_state = "Power OFF" if current_state == "Power ON" else "Power ON"
-        self.power_btn.config(text=new_state)
+        self._power_on = not self._power_on
+        self.power_btn.config(text="Power OFF" if self._power_on else "Power ON")
 
         # Update status LED
-        self.status_label.config(
-            foreground="green" if new_state == "Power OFF" else "red"
-        )
+        self.status_label.config(foreground="green" if self._power_on else "red")
 
         if "power" in self.callbacks:
-            self.callbacks["power"](new_state == "Power OFF")
-            logger.info(f"Power toggled to {new_state}")
+            self.callbacks["power"](self._power_on)
+            logger.info(f"Power toggled {'on' if self._power_on else 'off'}")
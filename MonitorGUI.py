@@ -10,22 +10,58 @@ import json
 import logging
 from datetime import datetime
 import sqlite3
-from typing import Dict, Optional
+from typing import Dict, Optional, Set, Tuple
 import threading
+import socket
+import concurrent.futures
+import bisect
+import collections
+import re
 from mqtt_init import broker_ip, port, username, password, BASE_TOPIC, ALARM_TOPIC
+from logging_setup import configure_logging
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("monitor_gui.log"), logging.StreamHandler()],
-)
+configure_logging("monitor_gui.log")
 logger = logging.getLogger("MonitorGUI")
 
+# Socket receive buffer for the MQTT connection
+RCVBUF_SIZE = 8 * 1024 * 1024
+
+# Lengths of the topic suffixes following the bin id
+_LEVEL_SUFFIX_LEN = len("/fill_level")
+_STATUS_SUFFIX_LEN = len("/status")
+
+# Fill level payloads are ASCII decimals such as b"42.5"
+_FLOAT_RE = re.compile(rb"-?\d+(\.\d+)?")
+
+# Maximum number of alarms kept in the alarm view
+MAX_ALARM_ROWS = 500
+
+# Interval at which the Tk thread checks for finished database reads
+DB_POLL_INTERVAL_MS = 100
+
 
 class BinMonitorGUI:
     """Main monitoring interface for the smart bin system"""
 
+    # Set once the shared ttk styles have been configured
+    _styles_ready = False
+
+    # Fill level thresholds and the progress bar style below/between/above them
+    _thresholds = (60.0, 80.0)
+    _styles = (
+        "Green.Horizontal.TProgressbar",
+        "Yellow.Horizontal.TProgressbar",
+        "Red.Horizontal.TProgressbar",
+    )
+
     def __init__(self, master: tk.Tk):
         """Initialize the monitoring GUI"""
         self.master = master
@@ -36,6 +72,31 @@ class BinMonitorGUI:
         self.bins: Dict[str, Dict] = {}  # Store bin widgets
         self.client: Optional[mqtt.Client] = None
         self.db_path = "bin_data.db"
+        self._base_len = len(BASE_TOPIC)
+        self._alarm_topics = frozenset({ALARM_TOPIC})
+
+        # Keep one database connection open for the lifetime of the GUI
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA temp_store=MEMORY")
+
+        # Database reads run off the Tk thread, which polls for their results
+        self._db_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._db_future: Optional[concurrent.futures.Future] = None
+
+        # Pending (level, status) per bin, flushed on the Tk thread when idle
+        self._dirty_bins: Dict[str, Tuple[Optional[float], Optional[str]]] = {}
+        self._dirty_lock = threading.Lock()
+        self._flush_scheduled = False
+
+        # Database is only polled until the initial load succeeds
+        self._initial_load_done = False
+        self._alarm_ids_shown: Set[int] = set()
+
+        # (bin_id, type, timestamp) of recent alarms, to drop redelivered copies
+        self._recent_alarm_keys: Set[Tuple[str, str, int]] = set()
+        self._recent_alarm_order: collections.deque = collections.deque()
 
         # Set up GUI
         self._setup_gui()
@@ -63,12 +124,26 @@ class BinMonitorGUI:
         self.main_container.columnconfigure(1, weight=1)
         self.main_container.rowconfigure(1, weight=1)
 
+        # Configure shared widget styles
+        self._init_styles()
+
         # Create sections
         self._create_header()
         self._create_bin_view()
         self._create_alarm_view()
         self._create_status_bar()
 
+    def _init_styles(self) -> None:
+        """Create progress bar styles"""
+        if self.__class__._styles_ready:
+            return
+
+        style = ttk.Style()
+        style.configure("Red.Horizontal.TProgressbar", background="red")
+        style.configure("Yellow.Horizontal.TProgressbar", background="yellow")
+        style.configure("Green.Horizontal.TProgressbar", background="green")
+        self.__class__._styles_ready = True
+
     def _create_header(self) -> None:
         """Create the header section"""
         header = ttk.Frame(self.main_container)
@@ -173,9 +248,18 @@ class BinMonitorGUI:
 
             # Set up callbacks
             self.client.on_connect = self._on_connect
-            self.client.on_message = self._on_message
             self.client.on_disconnect = self._on_disconnect
 
+            # Route messages to a handler per subscription
+            self.client.message_callback_add(
+                f"{BASE_TOPIC}+/fill_level", self._on_level_msg
+            )
+            self.client.message_callback_add(
+                f"{BASE_TOPIC}+/status", self._on_status_msg
+            )
+            for alarm_topic in self._alarm_topics:
+                self.client.message_callback_add(alarm_topic, self._on_alarm_msg)
+
             # Set up authentication if needed
             if username:
                 self.client.username_pw_set(username, password)
@@ -192,6 +276,11 @@ class BinMonitorGUI:
     def _on_connect(self, client, userdata, flags, rc: int) -> None:
         """Handle connection to MQTT broker"""
         if rc == 0:
+            # Enlarge the receive buffer so bursts don't shrink the TCP window
+            sock = self.client.socket()
+            if sock:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF_SIZE)
+
             self.conn_status.configure(foreground="green")
             self.status_var.set("Connected to MQTT broker")
             # Subscribe to all bin topics and alarms
@@ -199,8 +288,8 @@ class BinMonitorGUI:
             topics = [
                 (f"{BASE_TOPIC}+/fill_level", 0),
                 (f"{BASE_TOPIC}+/status", 0),
-                (ALARM_TOPIC, 0),
             ]
+            topics.extend((alarm_topic, 0) for alarm_topic in self._alarm_topics)
             self.client.subscribe(topics)
             logger.info(f"Subscribed to topics: {[t[0] for t in topics]}")
             logger.info("Connected to MQTT broker")
@@ -215,57 +304,110 @@ class BinMonitorGUI:
         self.status_var.set("Disconnected from broker")
         logger.warning(f"Disconnected from broker with code {rc}")
 
-    def _on_message(self, client, userdata, msg) -> None:
-        """Handle incoming MQTT messages"""
+    def _on_level_msg(self, client, userdata, msg) -> None:
+        """Handle fill level messages (municipal/bins/<bin_id>/fill_level)"""
         try:
-            # Extract topic information
-            topic = msg.topic
-            payload = msg.payload.decode()
-            logger.info(f"Received message on topic {topic}: {payload}")
-
-            if topic == ALARM_TOPIC:
-                # Handle alarm messages
-                alarm_data = json.loads(payload)
-                # Schedule alarm handling in main thread
-                self.master.after(0, lambda: self._handle_alarm(alarm_data))
-            else:
-                # Handle bin data
-                # Topic format is either municipal/binsbin_id/fill_level or municipal/binsbin_id/status
-                bin_id = topic.replace(BASE_TOPIC, "").split("/")[0]
-                data_type = topic.split("/")[-1]
-
-                if data_type == "fill_level":
-                    level = float(payload)
-                    # Schedule GUI update in main thread
-                    self.master.after(0, lambda: self._update_bin_level(bin_id, level))
-                elif data_type == "status":
-                    # Schedule GUI update in main thread
-                    self.master.after(
-                        0, lambda: self._update_bin_status(bin_id, payload)
-                    )
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Received message on topic %s: %s", msg.topic, msg.payload)
+            if not _FLOAT_RE.fullmatch(msg.payload):
+                logger.warning("Invalid fill level on %s: %r", msg.topic, msg.payload)
+                return
+            bin_id = msg.topic[self._base_len : -_LEVEL_SUFFIX_LEN]
+            self._mark_dirty(bin_id, level=float(msg.payload))
+        except Exception as e:
+            self._on_message_error(e)
 
+    def _on_status_msg(self, client, userdata, msg) -> None:
+        """Handle status messages (municipal/bins/<bin_id>/status)"""
+        try:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Received message on topic %s: %s", msg.topic, msg.payload)
+            bin_id = msg.topic[self._base_len : -_STATUS_SUFFIX_LEN]
+            self._mark_dirty(bin_id, status=msg.payload.decode())
         except Exception as e:
-            logger.error(f"Error processing message: {e}")
-            self.master.after(
-                0, lambda: self.status_var.set(f"Error processing message: {e}")
+            self._on_message_error(e)
+
+    def _on_alarm_msg(self, client, userdata, msg) -> None:
+        """Handle alarm messages"""
+        try:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Received message on topic %s: %s", msg.topic, msg.payload)
+            alarm_data = _json_loads(msg.payload)
+            # Schedule alarm handling in main thread
+            self.master.after(0, lambda: self._handle_alarm(alarm_data))
+        except Exception as e:
+            self._on_message_error(e)
+
+    def _on_message_error(self, e: Exception) -> None:
+        """Report an error raised while processing a message"""
+        logger.error(f"Error processing message: {e}")
+        self.master.after(
+            0, lambda: self.status_var.set(f"Error processing message: {e}")
+        )
+
+    def _mark_dirty(
+        self, bin_id: str, level: Optional[float] = None, status: Optional[str] = None
+    ) -> None:
+        """Record a bin update and schedule a flush in the main thread"""
+        with self._dirty_lock:
+            old_level, old_status = self._dirty_bins.get(bin_id, (None, None))
+            self._dirty_bins[bin_id] = (
+                old_level if level is None else level,
+                old_status if status is None else status,
             )
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self.master.after_idle(self._flush_dirty)
+
+    def _flush_dirty(self) -> None:
+        """Apply the latest pending level/status of every updated bin"""
+        with self._dirty_lock:
+            dirty, self._dirty_bins = self._dirty_bins, {}
+            self._flush_scheduled = False
+
+        for bin_id, (level, status) in dirty.items():
+            try:
+                if level is not None:
+                    self._update_bin_level(bin_id, level)
+                if status is not None:
+                    self._update_bin_status(bin_id, status)
+            except Exception as e:
+                logger.error(f"Error updating bin {bin_id}: {e}")
 
     def _handle_alarm(self, alarm_data: dict) -> None:
         """Handle incoming alarm messages"""
         try:
+            bin_id = alarm_data["bin_id"]
+            timestamp = alarm_data["timestamp"]
+            if isinstance(timestamp, int):
+                # Skip exact duplicates, e.g. QoS 1 redeliveries
+                key = (bin_id, alarm_data["type"], timestamp)
+                if key in self._recent_alarm_keys:
+                    return
+                self._recent_alarm_keys.add(key)
+                self._recent_alarm_order.append(key)
+                if len(self._recent_alarm_order) > MAX_ALARM_ROWS:
+                    self._recent_alarm_keys.discard(self._recent_alarm_order.popleft())
+                timestamp = datetime.fromtimestamp(timestamp / 1000).isoformat(
+                    timespec="seconds"
+                )
+
             # Add alarm to treeview
             self.alarm_tree.insert(
                 "",
                 0,
                 values=(
-                    alarm_data["timestamp"],
-                    alarm_data["bin_id"],
+                    timestamp,
+                    bin_id,
                     alarm_data["type"],
                     alarm_data["message"],
                 ),
                 tags=("alarm",),
             )
 
+            self._trim_alarm_tree()
+
             # Configure tag
             self.alarm_tree.tag_configure("alarm", foreground="red")
 
@@ -275,6 +417,12 @@ class BinMonitorGUI:
         except Exception as e:
             logger.error(f"Error handling alarm: {e}")
 
+    def _trim_alarm_tree(self) -> None:
+        """Drop the oldest alarms beyond MAX_ALARM_ROWS"""
+        stale = self.alarm_tree.get_children()[MAX_ALARM_ROWS:]
+        if stale:
+            self.alarm_tree.delete(*stale)
+
     def _update_bin_level(self, bin_id: str, level: float) -> None:
         """Update bin fill level display"""
         if bin_id not in self.bins:
@@ -286,13 +434,11 @@ class BinMonitorGUI:
         # Update progress bar
         bin_widgets["progress"]["value"] = level
 
-        # Update color based on level
-        if level >= 80:
-            bin_widgets["progress"]["style"] = "Red.Horizontal.TProgressbar"
-        elif level >= 60:
-            bin_widgets["progress"]["style"] = "Yellow.Horizontal.TProgressbar"
-        else:
-            bin_widgets["progress"]["style"] = "Green.Horizontal.TProgressbar"
+        # Update color only when the level crosses into another bucket
+        bucket = bisect.bisect_right(self._thresholds, level)
+        if bucket != bin_widgets["color_bucket"]:
+            bin_widgets["progress"]["style"] = self._styles[bucket]
+            bin_widgets["color_bucket"] = bucket
 
     def _update_bin_status(self, bin_id: str, status: str) -> None:
         """Update bin status display"""
@@ -309,12 +455,6 @@ class BinMonitorGUI:
         )
         bin_frame.pack(fill=tk.X, padx=5, pady=5)
 
-        # Create progress bar styles
-        style = ttk.Style()
-        style.configure("Red.Horizontal.TProgressbar", background="red")
-        style.configure("Yellow.Horizontal.TProgressbar", background="yellow")
-        style.configure("Green.Horizontal.TProgressbar", background="green")
-
         # Create widgets
         level_var = tk.StringVar(value="0.0%")
         status_var = tk.StringVar(value="Unknown")
@@ -326,7 +466,7 @@ class BinMonitorGUI:
             bin_frame,
             length=200,
             mode="determinate",
-            style="Green.Horizontal.TProgressbar",
+            style=self._styles[0],
         )
         progress.grid(row=1, column=0, columnspan=2, padx=5, pady=5)
 
@@ -339,6 +479,7 @@ class BinMonitorGUI:
             "level_var": level_var,
             "status_var": status_var,
             "progress": progress,
+            "color_bucket": 0,  # index into _styles
         }
 
     def _acknowledge_selected_alarm(self, event) -> None:
@@ -354,83 +495,138 @@ class BinMonitorGUI:
         self.status_var.set(f"Acknowledged alarm: {item['values'][3]}")
 
     def _schedule_updates(self) -> None:
-        """Schedule periodic updates"""
+        """Load initial state from the database; live updates arrive via MQTT"""
         self._update_from_database()
 
     def _update_from_database(self) -> None:
-        """Update GUI with data from database"""
+        """Load data from the database in the background"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-
-                # Get active alarms
-                try:
-                    cursor.execute(
-                        """
-                        SELECT id, bin_id, alarm_type, message, timestamp 
-                        FROM bin_alarms 
-                        WHERE acknowledged = FALSE 
-                        ORDER BY timestamp DESC
-                        """
-                    )
-                    alarms = cursor.fetchall()
-
-                    # Clear existing items
-                    for item in self.alarm_tree.get_children():
-                        self.alarm_tree.delete(item)
-
-                    # Add alarms to tree
-                    for alarm in alarms:
-                        self.alarm_tree.insert(
-                            "",
-                            tk.END,
-                            values=(
-                                alarm[4],  # timestamp
-                                alarm[1],  # bin_id
-                                alarm[2],  # type
-                                alarm[3],  # message
-                            ),
-                            tags=(str(alarm[0]),),  # store alarm id as tag
-                        )
-                except sqlite3.Error as e:
-                    logger.error(f"Error fetching alarms: {e}")
-                    # Continue with other updates even if alarms fail
-
-                # Get latest bin readings
-                try:
-                    cursor.execute(
-                        """
-                        SELECT DISTINCT bin_id 
+            future = self._db_executor.submit(self._query_database)
+        except RuntimeError:
+            return  # Executor shut down while closing
+        self._db_future = future
+        self.master.after(DB_POLL_INTERVAL_MS, self._poll_db_results)
+
+    def _poll_db_results(self) -> None:
+        """Apply database results once the worker has finished"""
+        # The worker never calls into Tk, so closing cannot deadlock on it
+        future = self._db_future
+        if future is None:
+            return
+        if not future.done():
+            self.master.after(DB_POLL_INTERVAL_MS, self._poll_db_results)
+            return
+
+        self._db_future = None
+        if not future.cancelled():
+            self._apply_db_results(future.result())
+
+    def _query_database(self) -> Tuple[list, list, list, bool]:
+        """Fetch active alarms, latest readings and statuses (runs in worker thread)"""
+        alarms: list = []
+        bin_levels: list = []
+        bin_statuses: list = []
+        loaded = True
+        try:
+            cursor = self._db.cursor()
+
+            # Get active alarms not yet shown
+            try:
+                last_id = max(self._alarm_ids_shown, default=0)
+                cursor.execute(
+                    """
+                    SELECT id, bin_id, alarm_type, message, timestamp 
+                    FROM bin_alarms 
+                    WHERE acknowledged = FALSE AND id > ?
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                    """,
+                    (last_id, MAX_ALARM_ROWS),
+                )
+                alarms = cursor.fetchall()
+            except sqlite3.Error as e:
+                logger.error(f"Error fetching alarms: {e}")
+                loaded = False
+                # Continue with other updates even if alarms fail
+
+            # Get latest bin readings
+            try:
+                cursor.execute("""
+                    SELECT bin_id, fill_level FROM (
+                        SELECT bin_id, fill_level, ROW_NUMBER() OVER (
+                            PARTITION BY bin_id ORDER BY timestamp DESC
+                        ) AS rn
                         FROM bin_readings
-                        """
                     )
-                    bins = cursor.fetchall()
-
-                    for bin_id in [b[0] for b in bins]:
-                        # Get latest reading
-                        cursor.execute(
-                            """
-                            SELECT fill_level 
-                            FROM bin_readings 
-                            WHERE bin_id = ? 
-                            ORDER BY timestamp DESC 
-                            LIMIT 1
-                            """,
-                            (bin_id,),
-                        )
-                        result = cursor.fetchone()
-                        if result:
-                            self._update_bin_level(bin_id, result[0])
-                except sqlite3.Error as e:
-                    logger.error(f"Error fetching bin readings: {e}")
+                    WHERE rn = 1
+                    """)
+                bin_levels = cursor.fetchall()
+            except sqlite3.Error as e:
+                logger.error(f"Error fetching bin readings: {e}")
+                loaded = False
+
+            # Get latest bin statuses, which are only published when they change
+            try:
+                cursor.execute("""
+                    SELECT bin_id, details FROM (
+                        SELECT bin_id, details, ROW_NUMBER() OVER (
+                            PARTITION BY bin_id ORDER BY timestamp DESC, id DESC
+                        ) AS rn
+                        FROM bin_events
+                        WHERE event_type = 'STATUS_CHANGE'
+                    )
+                    WHERE rn = 1
+                    """)
+                bin_statuses = cursor.fetchall()
+            except sqlite3.Error as e:
+                logger.error(f"Error fetching bin statuses: {e}")
+                loaded = False
 
         except sqlite3.Error as e:
             logger.error(f"Database error: {e}")
+            loaded = False
+        except Exception as e:
+            logger.error(f"Error updating from database: {e}")
+            loaded = False
+
+        return alarms, bin_levels, bin_statuses, loaded
+
+    def _apply_db_results(self, results: Tuple[list, list, list, bool]) -> None:
+        """Update GUI with data fetched from the database"""
+        alarms, bin_levels, bin_statuses, loaded = results
+        try:
+            # Add alarms to tree
+            for alarm in alarms:
+                self.alarm_tree.insert(
+                    "",
+                    tk.END,
+                    values=(
+                        alarm[4],  # timestamp
+                        alarm[1],  # bin_id
+                        alarm[2],  # type
+                        alarm[3],  # message
+                    ),
+                    tags=(str(alarm[0]),),  # store alarm id as tag
+                )
+                self._alarm_ids_shown.add(alarm[0])
+            self._trim_alarm_tree()
+
+            for bin_id, fill_level in bin_levels:
+                self._update_bin_level(bin_id, fill_level)
+            for bin_id, status in bin_statuses:
+                # A status already received over MQTT is newer than the stored one
+                widgets = self.bins.get(bin_id)
+                if widgets is None or widgets["status_var"].get() == "Unknown":
+                    self._update_bin_status(bin_id, status)
+
+            self._initial_load_done = loaded
+
         except Exception as e:
             logger.error(f"Error updating from database: {e}")
 
-        # Schedule next update
-        self.master.after(10000, self._update_from_database)
+        # Retry until the initial load succeeds (e.g. database not created yet)
+        if not self._initial_load_done:
+            self.master.after(10000, self._update_from_database)
 
     def _on_frame_configure(self, event=None) -> None:
         """Handle inner frame configuration"""
@@ -445,6 +641,13 @@ class BinMonitorGUI:
         if self.client:
             self.client.loop_stop()
             self.client.disconnect()
+        # Let a running query finish in the background, then close the
+        # connection on the worker thread once it is done with it
+        if self._db_future:
+            self._db_future.cancel()
+            self._db_future = None
+        self._db_executor.submit(self._db.close)
+        self._db_executor.shutdown(wait=False)
         self.master.destroy()
         logger.info("Application closed")
 
@@ -0,0 +1,90 @@
+"""
+Ultrasonic Sensor Farm Emulator
+Simulates many ultrasonic sensors in one process with vectorized updates
+"""
+
+import logging
+import tkinter as tk
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from UltrasonicSensor import MEASUREMENT_INTERVAL_MS
+
+logger = logging.getLogger("SensorFarm")
+
+
+class SensorFarm:
+    """Emulates a group of ultrasonic sensors updated in a single NumPy step"""
+
+    def __init__(
+        self,
+        sensor_ids: List[str],
+        data_callback: Callable[[str, float], None],
+        master: tk.Misc,
+    ):
+        """
+        Initialize the sensor farm emulator
+
+        Args:
+            sensor_ids: Unique identifiers of the simulated sensors
+            data_callback: Callback receiving (sensor_id, level) for each measurement
+            master: Tk widget whose event loop schedules the measurements
+        """
+        self.sensor_ids = list(sensor_ids)
+        self.data_callback = data_callback
+        self.master = master
+        self.is_running = False
+        self._index: Dict[str, int] = {sid: i for i, sid in enumerate(self.sensor_ids)}
+        self.levels = np.zeros(len(self.sensor_ids))
+        self.rates = np.ones(len(self.sensor_ids))
+        self.rng = np.random.default_rng()
+        self._after_id: Optional[str] = None
+        logger.info(f"Sensor farm with {len(self.sensor_ids)} sensors initialized")
+
+    def start(self) -> None:
+        """Start the measurement simulation for all sensors"""
+        if not self.is_running:
+            self.is_running = True
+            self._after_id = self.master.after(0, self._tick)
+            logger.info("Sensor farm started")
+
+    def stop(self) -> None:
+        """Stop the measurement simulation"""
+        self.is_running = False
+        if self._after_id:
+            self.master.after_cancel(self._after_id)
+            self._after_id = None
+        logger.info("Sensor farm stopped")
+
+    def simulate_emptying(self, sensor_id: str) -> None:
+        """Simulate one bin being emptied"""
+        self.levels[self._index[sensor_id]] = 0.0
+        self.data_callback(sensor_id, 0.0)
+        logger.info(f"Bin {sensor_id} emptied")
+
+    def _tick(self) -> None:
+        """Update every sensor at once and schedule the next measurement"""
+        if not self.is_running:
+            return
+
+        try:
+            # Only bins that are not yet full take a new measurement
+            active = np.flatnonzero(self.levels < 100)
+            if active.size:
+                noise = self.rng.uniform(-0.2, 0.2, size=active.size)
+                self.levels[active] = np.minimum(
+                    100, self.levels[active] + self.rates[active] + noise
+                )
+
+                # Send measurements through callback
+                for i, level in zip(active.tolist(), self.levels[active].tolist()):
+                    self.data_callback(self.sensor_ids[i], level)
+
+        except Exception as e:
+            logger.error(f"Error in measurement loop: {e}")
+            self.is_running = False
+            self._after_id = None
+            return
+
+        self._after_id = self.master.after(MEASUREMENT_INTERVAL_MS, self._tick)
@@ -8,19 +8,93 @@ from tkinter import ttk, messagebox
 import paho.mqtt.client as mqtt
 import random
 import logging
-from mqtt_init import broker_ip, port, username, password, BASE_TOPIC, BinStatus
+import socket
+import argparse
+from typing import Dict, Optional
+from mqtt_init import (
+    broker_ip,
+    port,
+    username,
+    password,
+    BASE_TOPIC,
+    RECONNECT_MIN_DELAY,
+    RECONNECT_MAX_DELAY,
+    SOCKET_BUFFER_SIZE,
+    BinStatus,
+)
+from logging_setup import configure_logging
 from UltrasonicSensor import UltrasonicSensor
 from ControlPanel import ControlPanel
-from BinActuator import BinActuator, ActuatorState
+from BinActuator import BinActuator, ActuatorState, ACTUATOR_STATE_NAMES
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("bin_system.log"), logging.StreamHandler()],
-)
+configure_logging("bin_system.log")
 logger = logging.getLogger("BinSystem")
 
+# Status payloads, UTF-8 encoded once
+_STATUS_PAYLOADS = {status: status.value.encode("utf-8") for status in BinStatus}
+
+# Actuator state label colors indexed by state ordinal
+_STATE_COLORS = (
+    "green",  # IDLE
+    "blue",  # OPENING
+    "blue",  # EMPTYING
+    "blue",  # CLOSING
+    "red",  # ERROR
+)
+
+# Fill level at which a bin empties itself automatically
+AUTO_EMPTY_LEVEL = 80
+
+
+def _bin_status(fill_level: float) -> BinStatus:
+    """Determine bin status from its fill level"""
+    if fill_level >= AUTO_EMPTY_LEVEL:
+        return BinStatus.NEEDS_EMPTYING
+    if fill_level <= 5:
+        return BinStatus.RECENTLY_EMPTIED
+    return BinStatus.NORMAL
+
+
+def _create_client(client_id: str, on_connect, on_disconnect) -> mqtt.Client:
+    """
+    Create an MQTT client and start connecting it to the broker
+
+    Args:
+        client_id: MQTT client identifier
+        on_connect: Connection callback
+        on_disconnect: Disconnection callback
+    """
+    client = mqtt.Client(client_id, clean_session=True)
+
+    # Set up callbacks
+    client.on_connect = on_connect
+    client.on_disconnect = on_disconnect
+
+    # Set up authentication if needed
+    if username:
+        client.username_pw_set(username, password)
+
+    # Back off between reconnect attempts
+    client.reconnect_delay_set(
+        min_delay=RECONNECT_MIN_DELAY, max_delay=RECONNECT_MAX_DELAY
+    )
+
+    # Connect to broker (numeric address, so reconnects skip DNS)
+    logger.info(f"Connecting to broker {broker_ip}")
+    client.connect(broker_ip, int(port))
+    client.loop_start()
+    return client
+
+
+def _tune_socket(client: mqtt.Client) -> None:
+    """Disable Nagle so small publishes are sent immediately"""
+    sock = client.socket()
+    if sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+
 
 class SmartBinSystem:
     """Integrates sensor, control panel and actuator emulators"""
@@ -33,6 +107,13 @@ class SmartBinSystem:
         # Generate unique bin ID
         self.bin_id = f"bin_{random.randint(1000, 9999)}"
 
+        # Topics published by this bin
+        self._fill_topic = f"{BASE_TOPIC}{self.bin_id}/fill_level"
+        self._status_topic = f"{BASE_TOPIC}{self.bin_id}/status"
+        self._state_topic = f"{BASE_TOPIC}{self.bin_id}/actuator_state"
+        self._last_status: Optional[BinStatus] = None
+        self._last_fill_info: Optional[mqtt.MQTTMessageInfo] = None
+
         # Create main container with three sections
         self.setup_gui()
 
@@ -42,6 +123,13 @@ class SmartBinSystem:
         # Initialize emulators
         self._setup_emulators()
 
+        # Start measuring from the Tk thread; Tk must not be called from the
+        # MQTT network thread that runs _on_connect. Readings taken before the
+        # broker answers queue behind the CONNECT packet or are skipped as
+        # backlog.
+        if hasattr(self, "client"):
+            self.sensor.start()
+
         # Configure window close handler
         self.master.protocol("WM_DELETE_WINDOW", self._on_closing)
 
@@ -109,20 +197,9 @@ class SmartBinSystem:
         """Set up MQTT client and connection"""
         try:
             client_id = f"bin_system_{self.bin_id}_{random.randint(0, 1000)}"
-            self.client = mqtt.Client(client_id, clean_session=True)
-
-            # Set up callbacks
-            self.client.on_connect = self._on_connect
-            self.client.on_disconnect = self._on_disconnect
-
-            # Set up authentication if needed
-            if username:
-                self.client.username_pw_set(username, password)
-
-            # Connect to broker
-            logger.info(f"Connecting to broker {broker_ip}")
-            self.client.connect(broker_ip, int(port))
-            self.client.loop_start()
+            self.client = _create_client(
+                client_id, self._on_connect, self._on_disconnect
+            )
 
         except Exception as e:
             logger.error(f"Failed to setup MQTT: {e}")
@@ -133,7 +210,7 @@ class SmartBinSystem:
     def _setup_emulators(self) -> None:
         """Initialize and connect the emulators"""
         # Initialize ultrasonic sensor
-        self.sensor = UltrasonicSensor(self.bin_id, self._on_sensor_data)
+        self.sensor = UltrasonicSensor(self.bin_id, self._on_sensor_data, self.master)
 
         # Initialize control panel
         self.control_panel = ControlPanel(self.control_frame, self.bin_id)
@@ -144,13 +221,17 @@ class SmartBinSystem:
         self.control_panel.register_callback("power", self._on_power_change)
 
         # Initialize actuator
-        self.actuator = BinActuator(self.bin_id, self._on_actuator_state_change)
+        self.actuator = BinActuator(
+            self.bin_id, self._on_actuator_state_change, self.master
+        )
 
     def _on_connect(self, client, userdata, flags, rc: int) -> None:
         """Handle MQTT connection"""
         if rc == 0:
+            _tune_socket(client)
             logger.info("Connected to MQTT broker")
-            self.sensor.start()  # Start sensor after connection
+            self._last_status = None  # Republish status on (re)connect
+            self._last_fill_info = None  # Reconnecting drops unsent packets
         else:
             logger.error(f"Connection failed with code {rc}")
 
@@ -164,28 +245,40 @@ class SmartBinSystem:
             # Update display
             self.level_var.set(f"{fill_level:.1f}%")
 
-            # Publish fill level
-            topic = f"{BASE_TOPIC}{self.bin_id}/fill_level"
-            message = f"{fill_level:.1f}"
-            logger.info(f"Publishing to {topic}: {message}")
-            self.client.publish(topic, message)
-
-            # Determine and publish bin status
-            status = "🟢 Normal"
-            if fill_level >= 80:
-                status = "⚠️ Needs Emptying"
-                # Automatically trigger emptying when bin is full
-                if self.actuator.get_state() == ActuatorState.IDLE:
-                    logger.info(
-                        f"Bin {self.bin_id} reached {fill_level}% - automatically emptying"
+            # Determine bin status
+            status = _bin_status(fill_level)
+
+            # Publish fill level, and status back-to-back only when it changed,
+            # so the network thread drains both packets in one write pass
+            message = b"%.1f" % fill_level
+            debug = logger.isEnabledFor(logging.DEBUG)
+            # Readings supersede each other: skip this one while the previous
+            # reading is still unsent, so at most one stale reading is queued
+            info = self._last_fill_info
+            if info and info.rc == mqtt.MQTT_ERR_SUCCESS and not info.is_published():
+                if debug:
+                    logger.debug("Backlogged, skipping reading %.1f", fill_level)
+            else:
+                if debug:
+                    logger.debug("Publishing to %s: %.1f", self._fill_topic, fill_level)
+                self._last_fill_info = self.client.publish(self._fill_topic, message)
+            if status != self._last_status:
+                if debug:
+                    logger.debug(
+                        "Publishing to %s: %s", self._status_topic, status.value
                     )
-                    self.actuator.trigger_empty()
-            elif fill_level <= 5:
-                status = "✅ Recently Emptied"
-
-            status_topic = f"{BASE_TOPIC}{self.bin_id}/status"
-            logger.info(f"Publishing to {status_topic}: {status}")
-            self.client.publish(status_topic, status)
+                self.client.publish(self._status_topic, _STATUS_PAYLOADS[status])
+                self._last_status = status
+
+            # Automatically trigger emptying when bin is full
+            if (
+                fill_level >= AUTO_EMPTY_LEVEL
+                and self.actuator.get_state() == ActuatorState.IDLE
+            ):
+                logger.info(
+                    f"Bin {self.bin_id} reached {fill_level}% - automatically emptying"
+                )
+                self.actuator.trigger_empty()
 
         except Exception as e:
             logger.error(f"Error publishing sensor data: {e}")
@@ -208,23 +301,13 @@ class SmartBinSystem:
             self.actuator.power_off()
 
     def _on_actuator_state_change(self, state: ActuatorState) -> None:
-        """Handle actuator state changes"""
+        """Handle actuator state changes (called on the Tk thread)"""
         # Update display
-        self.actuator_state_var.set(state.value)
+        state_name = ACTUATOR_STATE_NAMES[state]
+        self.actuator_state_var.set(state_name)
 
         # Update color based on state
-        color = "black"
-        if state == ActuatorState.ERROR:
-            color = "red"
-        elif state == ActuatorState.IDLE:
-            color = "green"
-        elif state in (
-            ActuatorState.OPENING,
-            ActuatorState.EMPTYING,
-            ActuatorState.CLOSING,
-        ):
-            color = "blue"
-        self.state_label.configure(foreground=color)
+        self.state_label.configure(foreground=_STATE_COLORS[state])
 
         if state == ActuatorState.IDLE:
             # Reset sensor reading when emptying is complete
@@ -232,8 +315,7 @@ class SmartBinSystem:
 
         # Publish actuator state
         try:
-            topic = f"{BASE_TOPIC}/{self.bin_id}/actuator_state"
-            self.client.publish(topic, state.value)
+            self.client.publish(self._state_topic, state_name)
         except Exception as e:
             logger.error(f"Error publishing actuator state: {e}")
 
@@ -248,10 +330,164 @@ class SmartBinSystem:
         logger.info(f"Smart bin system {self.bin_id} shut down")
 
 
+class SmartBinFarm:
+    """Simulates many smart bins in one process over a single MQTT client"""
+
+    def __init__(self, master: tk.Tk, bin_count: int):
+        """
+        Initialize the smart bin farm
+
+        Args:
+            master: Tk root whose event loop drives the simulation
+            bin_count: Number of bins to simulate
+        """
+        # NumPy is only needed when simulating many bins
+        from SensorFarm import SensorFarm
+
+        self.master = master
+        self.master.title("Smart Bin Farm")
+
+        # Generate unique bin IDs
+        self.bin_ids = [
+            f"bin_{n}" for n in random.sample(range(1000, 10000), bin_count)
+        ]
+
+        # Topics published by each bin, as (fill_level, status, actuator_state)
+        self._topics = {
+            bin_id: (
+                f"{BASE_TOPIC}{bin_id}/fill_level",
+                f"{BASE_TOPIC}{bin_id}/status",
+                f"{BASE_TOPIC}{bin_id}/actuator_state",
+            )
+            for bin_id in self.bin_ids
+        }
+        self._last_status: Dict[str, BinStatus] = {}
+
+        ttk.Label(
+            self.master,
+            text=f"Simulating {bin_count} bins",
+            font=("TkDefaultFont", 14, "bold"),
+            padding="10",
+        ).grid(row=0, column=0)
+
+        # One actuator per bin, powered on from the start; their emptying
+        # phases are all scheduled on this Tk event loop
+        self.actuators: Dict[str, BinActuator] = {}
+        for bin_id in self.bin_ids:
+            actuator = BinActuator(
+                bin_id,
+                lambda state, bin_id=bin_id: self._on_actuator_state_change(
+                    bin_id, state
+                ),
+                self.master,
+            )
+            self.actuators[bin_id] = actuator
+
+        self.farm = SensorFarm(self.bin_ids, self._on_sensor_data, self.master)
+
+        try:
+            client_id = f"bin_farm_{random.randint(0, 1000)}"
+            self.client = _create_client(
+                client_id, self._on_connect, self._on_disconnect
+            )
+        except Exception as e:
+            logger.error(f"Failed to setup MQTT: {e}")
+            messagebox.showerror(
+                "Connection Error", f"Failed to connect to MQTT broker: {e}"
+            )
+
+        for actuator in self.actuators.values():
+            actuator.power_on()
+
+        # Start measuring from the Tk thread, as SmartBinSystem does
+        if hasattr(self, "client"):
+            self.farm.start()
+
+        # Configure window close handler
+        self.master.protocol("WM_DELETE_WINDOW", self._on_closing)
+
+        logger.info(f"Smart bin farm with {bin_count} bins initialized")
+
+    def _on_connect(self, client, userdata, flags, rc: int) -> None:
+        """Handle MQTT connection"""
+        if rc == 0:
+            _tune_socket(client)
+            logger.info("Connected to MQTT broker")
+            self._last_status.clear()  # Republish status on (re)connect
+        else:
+            logger.error(f"Connection failed with code {rc}")
+
+    def _on_disconnect(self, client, userdata, rc: int) -> None:
+        """Handle MQTT disconnection"""
+        logger.warning(f"Disconnected from broker with code {rc}")
+
+    def _on_sensor_data(self, bin_id: str, fill_level: float) -> None:
+        """Publish a bin's reading, as SmartBinSystem does for its single bin"""
+        try:
+            fill_topic, status_topic, _ = self._topics[bin_id]
+            # Every bin publishes within the same tick, so readings are not
+            # skipped under backlog here: that would starve most of the bins
+            self.client.publish(fill_topic, b"%.1f" % fill_level)
+
+            status = _bin_status(fill_level)
+            if status != self._last_status.get(bin_id):
+                self.client.publish(status_topic, _STATUS_PAYLOADS[status])
+                self._last_status[bin_id] = status
+
+            # Automatically trigger emptying when bin is full
+            actuator = self.actuators[bin_id]
+            if (
+                fill_level >= AUTO_EMPTY_LEVEL
+                and actuator.get_state() == ActuatorState.IDLE
+            ):
+                logger.info(
+                    f"Bin {bin_id} reached {fill_level:.1f}% - automatically emptying"
+                )
+                actuator.trigger_empty()
+
+        except Exception as e:
+            logger.error(f"Error publishing sensor data for bin {bin_id}: {e}")
+
+    def _on_actuator_state_change(self, bin_id: str, state: ActuatorState) -> None:
+        """Handle actuator state changes of one bin"""
+        if state == ActuatorState.IDLE:
+            # Actuators run on the Tk event loop, like the sensor farm
+            self.farm.simulate_emptying(bin_id)
+
+        # Publish actuator state
+        try:
+            self.client.publish(self._topics[bin_id][2], ACTUATOR_STATE_NAMES[state])
+        except Exception as e:
+            logger.error(f"Error publishing actuator state: {e}")
+
+    def _on_closing(self) -> None:
+        """Clean up resources on window close"""
+        self.farm.stop()
+        for actuator in self.actuators.values():
+            actuator.power_off()
+        if hasattr(self, "client"):
+            self.client.loop_stop()
+            self.client.disconnect()
+        self.master.destroy()
+        logger.info("Smart bin farm shut down")
+
+
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--bins",
+        type=int,
+        default=1,
+        help="number of bins to simulate in this process",
+    )
+    args = parser.parse_args()
+
     root = tk.Tk()
-    app = SmartBinSystem(root)
+    if args.bins > 1:
+        app = SmartBinFarm(root, args.bins)
+    else:
+        app = SmartBinSystem(root)
     root.mainloop()
 
 
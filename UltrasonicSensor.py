@@ -3,53 +3,53 @@ Ultrasonic Sensor Emulator for Bin Fill-Level Detection
 Simulates an ultrasonic sensor that produces fill-level measurements
 """
 
-import time
 import random
 import logging
+import tkinter as tk
 from typing import Optional, Callable
-import threading
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("sensors.log"), logging.StreamHandler()],
-)
+
 logger = logging.getLogger("UltrasonicSensor")
 
+# Simulated sensor reading interval
+MEASUREMENT_INTERVAL_MS = 1000
+
 
 class UltrasonicSensor:
     """Emulates an ultrasonic sensor that measures fill level"""
 
-    def __init__(self, sensor_id: str, data_callback: Callable[[float], None]):
+    def __init__(
+        self, sensor_id: str, data_callback: Callable[[float], None], master: tk.Misc
+    ):
         """
         Initialize the ultrasonic sensor emulator
 
         Args:
             sensor_id: Unique identifier for this sensor
             data_callback: Callback function to handle new measurements
+            master: Tk widget whose event loop schedules the measurements
         """
         self.sensor_id = sensor_id
         self.data_callback = data_callback
+        self.master = master
         self.is_running = False
         self.current_level = 0.0
         self.fill_rate = 1.0
-        self._thread: Optional[threading.Thread] = None
+        self._after_id: Optional[str] = None
         logger.info(f"Ultrasonic sensor {sensor_id} initialized")
 
     def start(self) -> None:
         """Start the sensor measurement simulation"""
         if not self.is_running:
             self.is_running = True
-            self._thread = threading.Thread(target=self._measurement_loop, daemon=True)
-            self._thread.start()
+            self._after_id = self.master.after(0, self._tick)
             logger.info(f"Sensor {self.sensor_id} started")
 
     def stop(self) -> None:
         """Stop the sensor measurement simulation"""
         self.is_running = False
-        if self._thread:
-            self._thread.join(timeout=1.0)
+        if self._after_id:
+            self.master.after_cancel(self._after_id)
+            self._after_id = None
         logger.info(f"Sensor {self.sensor_id} stopped")
 
     def set_fill_rate(self, rate: float) -> None:
@@ -67,29 +67,35 @@ class UltrasonicSensor:
         self.data_callback(self.current_level)
         logger.info(f"Bin {self.sensor_id} emptied")
 
-    def _measurement_loop(self) -> None:
-        """Main measurement simulation loop"""
-        while self.is_running:
-            try:
-                # Add some random noise to the measurement
-                noise = random.uniform(-0.2, 0.2)
-
-                # Update fill level with noise
-                if self.current_level < 100:
-                    self.current_level = min(
-                        100, self.current_level + self.fill_rate + noise
-                    )
+    def _tick(self) -> None:
+        """Take one measurement and schedule the next"""
+        if not self.is_running:
+            return
 
-                    # Send measurement through callback
-                    self.data_callback(self.current_level)
+        try:
+            if self.current_level < 100:
+                self._update_level()
 
+                # Send measurement through callback
+                self.data_callback(self.current_level)
+
+                if logger.isEnabledFor(logging.DEBUG):
                     logger.debug(
-                        f"Sensor {self.sensor_id} level: {self.current_level:.1f}%"
+                        "Sensor %s level: %.1f%%", self.sensor_id, self.current_level
                     )
 
-                time.sleep(1)  # Simulate sensor reading interval
+        except Exception as e:
+            logger.error(f"Error in measurement loop: {e}")
+            self.is_running = False
+            self._after_id = None
+            return
+
+        self._after_id = self.master.after(MEASUREMENT_INTERVAL_MS, self._tick)
+
+    def _update_level(self) -> None:
+        """Advance the simulated fill level"""
+        # Add some random noise to the measurement
+        noise = random.uniform(-0.2, 0.2)
 
-            except Exception as e:
-                logger.error(f"Error in measurement loop: {e}")
-                self.is_running = False
-                break
+        # Update fill level with noise
+        self.current_level = min(100, self.current_level + self.fill_rate + noise)
@@ -6,11 +6,20 @@ Collects data from MQTT broker, stores in database, and handles alarms
 import paho.mqtt.client as mqtt
 import sqlite3
 import json
+import sys
 import logging
 from datetime import datetime
+import time
 import threading
-from typing import Optional
+import asyncio
+import collections
+import re
+import itertools
+from typing import Callable, Dict, Optional, Tuple
 import os
+import socket
+import argparse
+import signal
 from mqtt_init import (
     broker_ip,
     port,
@@ -20,71 +29,136 @@ from mqtt_init import (
     ALARM_TOPIC,
     BIN_FILL_LEVEL_THRESHOLD,
     BIN_EMPTY_THRESHOLD,
+    SOCKET_BUFFER_SIZE,
+    RECONNECT_MIN_DELAY,
+    RECONNECT_MAX_DELAY,
 )
+from logging_setup import configure_logging
+
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+except ImportError:
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("bin_manager.log"), logging.StreamHandler()],
-)
+configure_logging("bin_manager.log")
 logger = logging.getLogger("DataManager")
 
+# Bin data topics: municipal/bins/<bin_id>/<data_type>
+TOPIC_RE = re.compile(
+    rf"^{re.escape(BASE_TOPIC)}([^/]+)/(fill_level|status|actuator_state)$"
+)
 
-def init_database(db_path: str) -> None:
-    """Initialize the database and create tables"""
-    try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-
-            # Create tables
-            cursor.execute("""DROP TABLE IF EXISTS bin_readings""")
-            cursor.execute("""DROP TABLE IF EXISTS bin_events""")
-            cursor.execute("""DROP TABLE IF EXISTS bin_alarms""")
-
-            cursor.execute("""
-            CREATE TABLE bin_readings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                bin_id TEXT NOT NULL,
-                fill_level REAL NOT NULL,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-            """)
-
-            cursor.execute("""
-            CREATE TABLE bin_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                bin_id TEXT NOT NULL,
-                event_type TEXT NOT NULL,
-                details TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-            """)
-
-            cursor.execute("""
-            CREATE TABLE bin_alarms (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                bin_id TEXT NOT NULL,
-                alarm_type TEXT NOT NULL,
-                message TEXT NOT NULL,
-                acknowledged BOOLEAN DEFAULT FALSE,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-            """)
+# Fill level readings are written in batches
+READING_BATCH_SIZE = 64  # flush early once this many readings are queued
+READING_FLUSH_INTERVAL = 0.5  # seconds
 
-            # Create indexes
-            cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_readings_bin_id ON bin_readings(bin_id)"
-            )
-            cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_events_bin_id ON bin_events(bin_id)"
-            )
-            cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_alarms_bin_id ON bin_alarms(bin_id)"
-            )
+# Interval between paho housekeeping calls (keepalive pings, reconnects)
+MQTT_MISC_INTERVAL = 1.0  # seconds
 
-            conn.commit()
-            logger.info(f"Database initialized at {db_path}")
+# SQL statements, reused so SQLite's statement cache can serve them
+SQL_INSERT_READING = "INSERT INTO bin_readings (bin_id, fill_level) VALUES (?, ?)"
+# Multi-row reading inserts by row count, built on first use
+SQL_INSERT_N: Dict[int, str] = {1: SQL_INSERT_READING}
+SQL_INSERT_EVENT = (
+    "INSERT INTO bin_events (bin_id, event_type, details) VALUES (?, ?, ?)"
+)
+SQL_INSERT_ALARM = (
+    "INSERT INTO bin_alarms (bin_id, alarm_type, message) VALUES (?, ?, ?)"
+)
+SQL_SELECT_BIN_DATA = """
+    SELECT fill_level, timestamp 
+    FROM bin_readings 
+    WHERE bin_id = ? 
+    ORDER BY timestamp DESC 
+    LIMIT ?
+"""
+SQL_SELECT_ACTIVE_ALARMS = """
+    SELECT bin_id, alarm_type, message, timestamp 
+    FROM bin_alarms 
+    WHERE acknowledged = FALSE 
+    ORDER BY timestamp DESC
+"""
+SQL_ACKNOWLEDGE_ALARM = "UPDATE bin_alarms SET acknowledged = TRUE WHERE id = ?"
+
+
+def _insert_readings_sql(n: int) -> str:
+    """Get an INSERT statement for n readings"""
+    sql = SQL_INSERT_N.get(n)
+    if sql is None:
+        sql = SQL_INSERT_N.setdefault(
+            n,
+            "INSERT INTO bin_readings (bin_id, fill_level) VALUES "
+            + ",".join(["(?, ?)"] * n),
+        )
+    return sql
+
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS bin_readings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bin_id TEXT NOT NULL,
+    fill_level REAL NOT NULL,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS bin_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bin_id TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    details TEXT,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS bin_alarms (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bin_id TEXT NOT NULL,
+    alarm_type TEXT NOT NULL,
+    message TEXT NOT NULL,
+    acknowledged BOOLEAN DEFAULT FALSE,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_readings_bin_id ON bin_readings(bin_id);
+CREATE INDEX IF NOT EXISTS idx_bin_readings_bin_time
+    ON bin_readings(bin_id, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_events_bin_id ON bin_events(bin_id);
+CREATE INDEX IF NOT EXISTS idx_alarms_bin_id ON bin_alarms(bin_id);
+"""
+
+RESET_SQL = """
+DROP TABLE IF EXISTS bin_readings;
+DROP TABLE IF EXISTS bin_events;
+DROP TABLE IF EXISTS bin_alarms;
+"""
+
+
+def init_database(db_path: str, reset: bool = False) -> None:
+    """
+    Initialize the database and create any missing tables
+
+    Args:
+        db_path: Path to the SQLite database file
+        reset: Drop existing tables (and their data) before creating them
+    """
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            # Run all DDL in one transaction
+            conn.executescript(
+                "BEGIN IMMEDIATE;"
+                + (RESET_SQL if reset else "")
+                + SCHEMA_SQL
+                + "COMMIT;"
+            )
+        finally:
+            conn.close()
+        logger.info(f"Database initialized at {db_path}")
 
     except sqlite3.Error as e:
         logger.error(f"Database error during initialization: {e}")
@@ -97,37 +171,85 @@ def init_database(db_path: str) -> None:
 class DataManager:
     """Manages data collection, storage, and alarm generation"""
 
-    def __init__(self, db_path: str = "bin_data.db"):
-        """Initialize the data manager"""
+    def __init__(self, db_path: str = "bin_data.db", reset: bool = False):
+        """
+        Initialize the data manager
+
+        Args:
+            db_path: Path to the SQLite database file
+            reset: Drop all stored data and recreate the tables
+        """
         self.db_path = db_path
         self.client: Optional[mqtt.Client] = None
         self.connected = False
 
         # Initialize database
-        if not os.path.exists(self.db_path):
+        if reset:
+            logger.warning("Resetting database...")
+        elif not os.path.exists(self.db_path):
             logger.info("Creating new database...")
-            init_database(self.db_path)
         else:
             logger.info("Using existing database")
-            # Verify tables exist
+        init_database(self.db_path, reset=reset)
+
+        # Keep one connection open, shared by the MQTT handlers and callers
+        self._db = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA temp_store=MEMORY")
+        self._db_lock = threading.Lock()
+
+        # Event type and optional follow-up check by topic data type, for
+        # every message other than fill level readings
+        self._events: Dict[str, Tuple[str, Optional[Callable[[str, str], None]]]] = {
+            "status": ("STATUS_CHANGE", None),
+            "actuator_state": ("ACTUATOR_STATE", self._check_actuator_state),
+        }
+
+        # Readings are queued and written in batches by a loop timer
+        self._pending_readings: collections.deque = collections.deque()
+
+        # Event loop driving the MQTT client, set by run()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+
+        # Reconnect backoff, doubled after each attempt until connected
+        self._reconnect_delay = RECONNECT_MIN_DELAY
+        self._next_reconnect = 0.0  # event loop time
+
+    async def run(self) -> None:
+        """Connect to the broker and process messages until stopped"""
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+
+        # Shut down cleanly on SIGTERM/SIGINT
+        for sig in (signal.SIGTERM, signal.SIGINT):
             try:
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                    tables = {row[0] for row in cursor.fetchall()}
-                    required_tables = {"bin_readings", "bin_events", "bin_alarms"}
-                    if not required_tables.issubset(tables):
-                        logger.warning(
-                            "Missing required tables, reinitializing database..."
-                        )
-                        init_database(self.db_path)
-            except sqlite3.Error as e:
-                logger.error(f"Error verifying database tables: {e}")
-                logger.info("Reinitializing database...")
-                init_database(self.db_path)
+                self._loop.add_signal_handler(sig, self._on_stop_signal)
+            except (NotImplementedError, RuntimeError):
+                pass  # Not supported on this platform/thread
 
         # Set up MQTT connection
         self._setup_mqtt()
+        self._timers["misc"] = self._loop.call_later(
+            MQTT_MISC_INTERVAL, self._on_misc_timer
+        )
+        self._timers["flush"] = self._loop.call_later(
+            READING_FLUSH_INTERVAL, self._on_flush_timer
+        )
+
+        try:
+            await self._stop_event.wait()
+        finally:
+            self._shutdown()
+
+    def _on_stop_signal(self) -> None:
+        """Handle a termination signal"""
+        logger.info("Shutting down...")
+        self._stop_event.set()
 
     def _setup_mqtt(self) -> None:
         """Set up MQTT client and connection"""
@@ -141,6 +263,12 @@ class DataManager:
             self.client.on_message = self._on_message
             self.client.on_disconnect = self._on_disconnect
 
+            # Let the event loop drive the client's socket
+            self.client.on_socket_open = self._on_socket_open
+            self.client.on_socket_close = self._on_socket_close
+            self.client.on_socket_register_write = self._on_socket_register_write
+            self.client.on_socket_unregister_write = self._on_socket_unregister_write
+
             # Set up authentication if needed
             if username:
                 self.client.username_pw_set(username, password)
@@ -148,21 +276,75 @@ class DataManager:
             # Connect to broker
             logger.info(f"Connecting to broker {broker_ip}")
             self.client.connect(broker_ip, int(port))
-            self.client.loop_start()
 
         except Exception as e:
             logger.error(f"MQTT setup error: {e}")
             raise
 
+    def _on_socket_open(self, client, userdata, sock) -> None:
+        """Watch a newly opened client socket for incoming data"""
+        self._loop.add_reader(sock, client.loop_read)
+
+    def _on_socket_close(self, client, userdata, sock) -> None:
+        """Stop watching a closed client socket"""
+        self._loop.remove_reader(sock)
+
+    def _on_socket_register_write(self, client, userdata, sock) -> None:
+        """Write queued packets once the socket is writable"""
+        self._loop.add_writer(sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock) -> None:
+        """Stop waiting for the socket to become writable"""
+        self._loop.remove_writer(sock)
+
+    def _on_misc_timer(self) -> None:
+        """Run paho housekeeping and reconnect if the connection was lost"""
+        if (
+            self.client.loop_misc() == mqtt.MQTT_ERR_NO_CONN
+            and self._loop.time() >= self._next_reconnect
+        ):
+            # reconnect() blocks the loop while connecting, so back off
+            # between attempts instead of retrying on every tick
+            try:
+                logger.info(f"Reconnecting to broker {broker_ip}")
+                self.client.reconnect()
+            except Exception as e:
+                logger.error(
+                    f"Reconnect failed: {e}; retrying in {self._reconnect_delay}s"
+                )
+            self._next_reconnect = self._loop.time() + self._reconnect_delay
+            self._reconnect_delay = min(self._reconnect_delay * 2, RECONNECT_MAX_DELAY)
+        self._timers["misc"] = self._loop.call_later(
+            MQTT_MISC_INTERVAL, self._on_misc_timer
+        )
+
+    def _on_flush_timer(self) -> None:
+        """Write queued readings and schedule the next flush"""
+        self._flush_readings()
+        self._timers["flush"] = self._loop.call_later(
+            READING_FLUSH_INTERVAL, self._on_flush_timer
+        )
+
     def _on_connect(self, client, userdata, flags, rc: int) -> None:
         """Handle connection to MQTT broker"""
         if rc == 0:
             self.connected = True
-            # Subscribe to all bin topics
-            self.client.subscribe(f"{BASE_TOPIC}+/fill_level")
-            self.client.subscribe(f"{BASE_TOPIC}+/status")
-            self.client.subscribe(f"{BASE_TOPIC}+/actuator_state")
-            self.client.subscribe(ALARM_TOPIC)
+            self._reconnect_delay = RECONNECT_MIN_DELAY
+            # Disable Nagle so small publishes are sent immediately
+            sock = self.client.socket()
+            if sock:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+            # Subscribe to all bin topics with a single SUBSCRIBE packet
+            self.client.subscribe(
+                [
+                    (f"{BASE_TOPIC}+/fill_level", 0),
+                    (f"{BASE_TOPIC}+/status", 0),
+                    (f"{BASE_TOPIC}+/actuator_state", 0),
+                    (ALARM_TOPIC, 0),
+                ]
+            )
             logger.info("Connected to MQTT broker")
         else:
             logger.error(f"Connection failed with code {rc}")
@@ -175,46 +357,40 @@ class DataManager:
     def _on_message(self, client, userdata, msg) -> None:
         """Handle incoming MQTT messages"""
         try:
-            # Ignore messages from non-bin topics
-            if not msg.topic.startswith(BASE_TOPIC) and msg.topic != ALARM_TOPIC:
-                logger.debug(f"Ignoring message from unrelated topic: {msg.topic}")
+            # Ignore alarms and messages from unrelated topics
+            m = TOPIC_RE.match(msg.topic)
+            if not m:
                 return
 
-            # Extract bin_id from topic
-            topic_parts = msg.topic.split("/")
-            if len(topic_parts) < 3:
+            # Bin ids come from a small set; interning them lets queued rows
+            # share one string object per bin instead of a copy per message
+            bin_id = sys.intern(m.group(1))
+            data_type = m.group(2)
+            if data_type == "fill_level":
+                self._handle_fill_level(bin_id, msg.payload)
                 return
 
-            bin_id = topic_parts[-2]
-            data_type = topic_parts[-1]
-            payload = msg.payload.decode()
-
-            # Handle different types of data
-            if data_type == "fill_level":
-                try:
-                    fill_level = float(payload)
-                    self._handle_fill_level(bin_id, fill_level)
-                except ValueError:
-                    logger.error(f"Invalid fill level value: {payload}")
-            elif data_type == "status":
-                self._handle_status(bin_id, payload)
-            elif data_type == "actuator_state":
-                self._handle_actuator_state(bin_id, payload)
+            event_type, check = self._events[data_type]
+            details = msg.payload.decode()
+            if self._record_event(bin_id, event_type, details) and check:
+                check(bin_id, details)
 
         except Exception as e:
             logger.error(f"Error processing message: {e}")
 
-    def _handle_fill_level(self, bin_id: str, fill_level: float) -> None:
+    def _handle_fill_level(self, bin_id: str, payload: bytes) -> None:
         """Handle fill level readings"""
         try:
-            # Store reading in database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT INTO bin_readings (bin_id, fill_level) VALUES (?, ?)",
-                    (bin_id, fill_level),
-                )
-                conn.commit()
+            fill_level = float(payload)
+        except ValueError:
+            logger.error(f"Invalid fill level value: {payload!r}")
+            return
+
+        try:
+            # Queue reading for the next batch insert
+            self._pending_readings.append((bin_id, fill_level))
+            if len(self._pending_readings) >= READING_BATCH_SIZE:
+                self._flush_readings()
 
             # Check for alarms
             if fill_level >= BIN_FILL_LEVEL_THRESHOLD:
@@ -225,60 +401,73 @@ class DataManager:
         except sqlite3.Error as e:
             logger.error(f"Database error storing fill level: {e}")
 
-    def _handle_status(self, bin_id: str, status: str) -> None:
-        """Handle bin status updates"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT INTO bin_events (bin_id, event_type, details) VALUES (?, 'STATUS_CHANGE', ?)",
-                    (bin_id, status),
-                )
-                conn.commit()
+    def _flush_readings(self) -> None:
+        """Write all queued readings in a single transaction"""
+        rows = []
+        while self._pending_readings:
+            rows.append(self._pending_readings.popleft())
+        if not rows:
+            return
 
+        try:
+            with self._db_lock:
+                self._db.execute("BEGIN")
+                try:
+                    # One multi-row INSERT per chunk of up to READING_BATCH_SIZE
+                    for i in range(0, len(rows), READING_BATCH_SIZE):
+                        chunk = rows[i : i + READING_BATCH_SIZE]
+                        self._db.execute(
+                            _insert_readings_sql(len(chunk)),
+                            list(itertools.chain.from_iterable(chunk)),
+                        )
+                    self._db.execute("COMMIT")
+                except sqlite3.Error:
+                    self._db.execute("ROLLBACK")
+                    raise
         except sqlite3.Error as e:
-            logger.error(f"Database error storing status: {e}")
+            logger.error(f"Database error storing {len(rows)} fill levels: {e}")
 
-    def _handle_actuator_state(self, bin_id: str, state: str) -> None:
-        """Handle actuator state changes"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT INTO bin_events (bin_id, event_type, details) VALUES (?, 'ACTUATOR_STATE', ?)",
-                    (bin_id, state),
-                )
-                conn.commit()
+    def _record_event(self, bin_id: str, event_type: str, details: str) -> bool:
+        """
+        Store a bin event such as a status or actuator state change
 
-            # Create alarm if actuator reports error
-            if state == "ERROR":
-                self._create_alarm(
-                    bin_id, "ACTUATOR_ERROR", f"Bin {bin_id} actuator reported an error"
-                )
+        Args:
+            bin_id: Bin that reported the event
+            event_type: Event type stored with the record
+            details: Decoded message payload
+        """
+        try:
+            with self._db_lock:
+                self._db.execute(SQL_INSERT_EVENT, (bin_id, event_type, details))
+            return True
 
         except sqlite3.Error as e:
-            logger.error(f"Database error storing actuator state: {e}")
+            logger.error(f"Database error storing {event_type} event: {e}")
+            return False
+
+    def _check_actuator_state(self, bin_id: str, state: str) -> None:
+        """Create alarm if actuator reports error"""
+        if state == "ERROR":
+            self._create_alarm(
+                bin_id, "ACTUATOR_ERROR", f"Bin {bin_id} actuator reported an error"
+            )
 
     def _create_alarm(self, bin_id: str, alarm_type: str, message: str) -> None:
         """Create and publish an alarm"""
         try:
             # Store alarm in database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT INTO bin_alarms (bin_id, alarm_type, message) VALUES (?, ?, ?)",
-                    (bin_id, alarm_type, message),
-                )
-                conn.commit()
+            with self._db_lock:
+                self._db.execute(SQL_INSERT_ALARM, (bin_id, alarm_type, message))
 
             # Publish alarm to MQTT
             alarm_data = {
                 "bin_id": bin_id,
                 "type": alarm_type,
                 "message": message,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": time.time_ns() // 1_000_000,  # epoch ms
             }
-            self.client.publish(ALARM_TOPIC, json.dumps(alarm_data))
+            # Alarms are rare and must not be lost, so use QoS 1
+            self.client.publish(ALARM_TOPIC, _json_dumps(alarm_data), qos=1)
             logger.warning(f"Alarm created: {message}")
 
         except Exception as e:
@@ -287,19 +476,8 @@ class DataManager:
     def get_bin_data(self, bin_id: str, limit: int = 100) -> list:
         """Get recent data for a specific bin"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT fill_level, timestamp 
-                    FROM bin_readings 
-                    WHERE bin_id = ? 
-                    ORDER BY timestamp DESC 
-                    LIMIT ?
-                    """,
-                    (bin_id, limit),
-                )
-                return cursor.fetchall()
+            with self._db_lock:
+                return self._db.execute(SQL_SELECT_BIN_DATA, (bin_id, limit)).fetchall()
         except sqlite3.Error as e:
             logger.error(f"Error fetching bin data: {e}")
             return []
@@ -307,17 +485,8 @@ class DataManager:
     def get_active_alarms(self) -> list:
         """Get all unacknowledged alarms"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT bin_id, alarm_type, message, timestamp 
-                    FROM bin_alarms 
-                    WHERE acknowledged = FALSE 
-                    ORDER BY timestamp DESC
-                    """
-                )
-                return cursor.fetchall()
+            with self._db_lock:
+                return self._db.execute(SQL_SELECT_ACTIVE_ALARMS).fetchall()
         except sqlite3.Error as e:
             logger.error(f"Error fetching alarms: {e}")
             return []
@@ -325,87 +494,52 @@ class DataManager:
     def acknowledge_alarm(self, alarm_id: int) -> None:
         """Mark an alarm as acknowledged"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "UPDATE bin_alarms SET acknowledged = TRUE WHERE id = ?",
-                    (alarm_id,),
-                )
-                conn.commit()
+            with self._db_lock:
+                self._db.execute(SQL_ACKNOWLEDGE_ALARM, (alarm_id,))
         except sqlite3.Error as e:
             logger.error(f"Error acknowledging alarm: {e}")
 
     def stop(self) -> None:
         """Stop the data manager"""
-        if self.client:
-            self.client.loop_stop()
-            self.client.disconnect()
-        logger.info("Data manager stopped")
+        if self._loop and self._stop_event:
+            # Let run() shut down on its own loop
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+        else:
+            self._shutdown()
 
-    def setup_database(self) -> None:
-        """Set up SQLite database and tables"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-
-                # Create tables
-                cursor.execute("""
-                CREATE TABLE IF NOT EXISTS bin_readings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    bin_id TEXT NOT NULL,
-                    fill_level REAL NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-                """)
-
-                cursor.execute("""
-                CREATE TABLE IF NOT EXISTS bin_events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    bin_id TEXT NOT NULL,
-                    event_type TEXT NOT NULL,
-                    details TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-                """)
-
-                cursor.execute("""
-                CREATE TABLE IF NOT EXISTS bin_alarms (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    bin_id TEXT NOT NULL,
-                    alarm_type TEXT NOT NULL,
-                    message TEXT NOT NULL,
-                    acknowledged BOOLEAN DEFAULT FALSE,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-                """)
+    def _shutdown(self) -> None:
+        """Disconnect from the broker and close the database"""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
 
-                # Verify tables were created
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                tables = cursor.fetchall()
-                logger.info(
-                    f"Database tables created: {[table[0] for table in tables]}"
-                )
+        if self.client:
+            self.client.disconnect()
+            # disconnect() only queues the packet for the loop's writer, and
+            # the loop closes once run() returns, so write it out now
+            self.client.loop_write()
 
-                conn.commit()
-                logger.info("Database setup complete")
+        # Write any readings still queued
+        self._flush_readings()
 
-        except sqlite3.Error as e:
-            logger.error(f"Database error: {e}")
-            raise
+        with self._db_lock:
+            self._db.close()
+        logger.info("Data manager stopped")
 
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--reset", action="store_true", help="drop all stored data on start-up"
+    )
+    args = parser.parse_args()
+
     try:
-        manager = DataManager()
-        # Keep the main thread running
-        while True:
-            try:
-                threading.Event().wait()
-            except KeyboardInterrupt:
-                logger.info("Shutting down...")
-                manager.stop()
-                break
+        manager = DataManager(reset=args.reset)
+        asyncio.run(manager.run())
+    except KeyboardInterrupt:
+        logger.info("Shutting down...")
     except Exception as e:
         logger.critical(f"Fatal error: {e}")
         raise
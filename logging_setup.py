@@ -0,0 +1,76 @@
+"""
+Logging Configuration Module
+Sets up the shared log format and handlers once per process
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+from typing import List, Optional, Set
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class _HandlerGroup(logging.Handler):
+    """Passes each record on to a list of handlers that can grow over time"""
+
+    def __init__(self):
+        super().__init__()
+        self._handlers: List[logging.Handler] = []
+
+    def add_handler(self, handler: logging.Handler) -> None:
+        """Add a handler, also while the listener thread is emitting records"""
+        with self.lock:
+            self._handlers.append(handler)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # handle() holds self.lock, so the list cannot change underneath
+        for handler in self._handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handlers = _HandlerGroup()
+_log_files: Set[str] = set()
+
+
+def configure_logging(
+    log_file: Optional[str] = None, level: int = logging.INFO
+) -> None:
+    """
+    Configure the root logger for this process
+
+    The first call routes all records through a queue to a background
+    listener that writes them to the console. Any call may add a log file
+    to the listener's handler group; repeated calls are otherwise no-ops,
+    so every module can call it safely.
+
+    Args:
+        log_file: Optional file to write log records to, besides the console
+        level: Minimum level of records to emit (set by the first call)
+    """
+    global _listener
+    if _listener is None:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(LOG_FORMAT))
+        _handlers.add_handler(console)
+        _listener = logging.handlers.QueueListener(log_queue, _handlers)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+            handler.close()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        root.setLevel(level)
+
+    if log_file and log_file not in _log_files:
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        _handlers.add_handler(file_handler)
+        _log_files.add(log_file)
@@ -5,13 +5,12 @@ Handles all MQTT broker connection settings and common variables
 
 import socket
 import logging
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from enum import Enum
+from logging_setup import configure_logging
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+configure_logging()
 logger = logging.getLogger("MQTT_Init")
 
 # Broker Configuration
@@ -23,19 +22,22 @@ BROKER_CONFIGS: List[Tuple[str, str]] = [
 # Select broker (0 for HIT, 1 for Mosquitto)
 SELECTED_BROKER: int = 1
 
-# Resolve broker IP and get configuration
+# Resolve broker IP once (IPv4) and get configuration
+broker_hostname: str = BROKER_CONFIGS[SELECTED_BROKER][0]
+port: str = BROKER_CONFIGS[SELECTED_BROKER][1]
+_RESOLVED_IP: Optional[str] = None
 try:
-    broker_hostname = BROKER_CONFIGS[SELECTED_BROKER][0]
     logger.info(f"Resolving hostname: {broker_hostname}")
-    broker_ip: str = str(socket.gethostbyname(broker_hostname))
-    port: str = BROKER_CONFIGS[SELECTED_BROKER][1]
-    logger.info(f"Successfully resolved {broker_hostname} to {broker_ip}")
+    _RESOLVED_IP = socket.getaddrinfo(
+        broker_hostname, int(port), socket.AF_INET, socket.SOCK_STREAM
+    )[0][4][0]
+    logger.info(f"Successfully resolved {broker_hostname} to {_RESOLVED_IP}")
 except (socket.gaierror, IndexError) as e:
     logger.error(f"Error resolving broker address: {e}")
-    # Fallback to direct hostname
-    broker_ip = BROKER_CONFIGS[SELECTED_BROKER][0]  # Use hostname directly
-    port = BROKER_CONFIGS[SELECTED_BROKER][1]
-    logger.warning(f"Using direct hostname: {broker_ip}:{port}")
+    logger.warning(f"Using direct hostname: {broker_hostname}:{port}")
+
+# Numeric address when resolved, so reconnects skip DNS; hostname otherwise
+broker_ip: str = _RESOLVED_IP or broker_hostname
 
 # Authentication settings
 username: str = "MATZI" if SELECTED_BROKER == 0 else ""
@@ -48,6 +50,9 @@ ALARM_TOPIC: str = f"{BASE_TOPIC}alarm"
 # Connection settings
 CONN_TIME: int = 0  # 0 for endless loop
 MANAGER_UPDATE_INTERVAL: int = 10  # seconds
+RECONNECT_MIN_DELAY: int = 1  # seconds
+RECONNECT_MAX_DELAY: int = 30  # seconds
+SOCKET_BUFFER_SIZE: int = 64 * 1024  # bytes, send/receive buffers for publishers
 
 # Threshold settings
 BIN_FILL_LEVEL_THRESHOLD: float = 80.0  # Percentage
@@ -63,6 +68,7 @@ class BinStatus(Enum):
 
 # Export all settings
 __all__ = [
+    "broker_hostname",
     "broker_ip",
     "port",
     "username",
@@ -71,6 +77,9 @@ __all__ = [
     "ALARM_TOPIC",
     "CONN_TIME",
     "MANAGER_UPDATE_INTERVAL",
+    "RECONNECT_MIN_DELAY",
+    "RECONNECT_MAX_DELAY",
+    "SOCKET_BUFFER_SIZE",
     "BIN_FILL_LEVEL_THRESHOLD",
     "BIN_EMPTY_THRESHOLD",
     "BinStatus",